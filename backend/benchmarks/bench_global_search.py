@@ -0,0 +1,72 @@
+"""Latency of DocumentService.search_all_sessions over a synthetic corpus.
+
+Indexes `--sessions` x `--chunks-per-session` chunks of Zipf-distributed
+words, then times queries with shards fanned out as one pool task per
+session, a single serial batch, and one batch per CPU.
+
+Run from the backend directory:
+    python benchmarks/bench_global_search.py --sessions 1000 --chunks-per-session 1000
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.document_service import DocumentService
+
+VOCABULARY_SIZE = 50000
+QUERY_COUNT = 50
+
+def random_text(rng: np.random.Generator, words: int) -> str:
+    ids = np.minimum(rng.zipf(1.3, size=words), VOCABULARY_SIZE)
+    return " ".join(f"term{i}" for i in ids)
+
+def build_service(sessions: int, chunks_per_session: int, words_per_chunk: int) -> DocumentService:
+    rng = np.random.default_rng(0)
+    service = DocumentService()
+    for s in range(sessions):
+        chunks = [random_text(rng, words_per_chunk) for _ in range(chunks_per_session)]
+        service.add_to_index(chunks, f"session-{s}", f"document-{s}.txt")
+    return service
+
+async def time_queries(service: DocumentService, queries, k: int):
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        await service.search_all_sessions(query, k=k)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=1000)
+    parser.add_argument("--chunks-per-session", type=int, default=1000)
+    parser.add_argument("--words-per-chunk", type=int, default=40)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    service = build_service(args.sessions, args.chunks_per_session, args.words_per_chunk)
+    total_chunks = args.sessions * args.chunks_per_session
+    print(f"Indexed {total_chunks:,} chunks in {args.sessions} sessions "
+          f"({time.perf_counter() - start:.1f}s)")
+
+    rng = np.random.default_rng(1)
+    queries = [random_text(rng, 4) for _ in range(QUERY_COUNT)]
+    cpus = os.cpu_count() or 1
+
+    for name, batches in (("task per session", args.sessions), ("serial", 1), (f"{cpus} batches", cpus)):
+        service.search_batches = batches
+        asyncio.run(time_queries(service, queries[:3], args.k))  # warm-up
+        latencies = asyncio.run(time_queries(service, queries, args.k))
+        p95 = statistics.quantiles(latencies, n=20)[-1]
+        print(f"{name:<18} p50 {statistics.median(latencies):8.1f} ms   p95 {p95:8.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""CPU cost per request of serializing a 5k-message session.
+
+Compares the previous path (Pydantic ChatSession round-trip + FastAPI's
+jsonable_encoder + json.dumps) with the orjson fast path used by
+`session_json_response`, with and without compression.
+
+Run from the backend directory:
+    python benchmarks/bench_serialization.py
+"""
+import gzip
+import json
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import brotli
+import orjson
+from fastapi.encoders import jsonable_encoder
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import settings
+from models import ChatSession
+
+MESSAGE_COUNT = 5000
+ITERATIONS = 20
+
+def build_session_document(message_count: int) -> dict:
+    """Build a raw session document as stored in Mongo"""
+    start = datetime(2024, 1, 1)
+    messages = []
+    for i in range(message_count):
+        messages.append({
+            "id": str(uuid.uuid4()),
+            "content": f"Message {i}: " + "lorem ipsum dolor sit amet " * 8,
+            "type": "user" if i % 2 == 0 else "bot",
+            "timestamp": start + timedelta(seconds=i),
+            "model": None if i % 2 == 0 else "gemini",
+        })
+    return {
+        "id": str(uuid.uuid4()),
+        "title": "Benchmark session",
+        "messages": messages,
+        "system_prompt": "You are a helpful assistant.",
+        "model": "gemini",
+        "document": None,
+        "created_at": start,
+    }
+
+def model_path(document: dict) -> bytes:
+    session = ChatSession(**document)
+    return json.dumps(jsonable_encoder(session)).encode("utf-8")
+
+def fast_path(document: dict) -> bytes:
+    return orjson.dumps(document)
+
+def fast_path_gzip(document: dict) -> bytes:
+    return gzip.compress(orjson.dumps(document), compresslevel=settings.GZIP_LEVEL)
+
+def fast_path_brotli(document: dict) -> bytes:
+    return brotli.compress(orjson.dumps(document), quality=settings.BROTLI_QUALITY)
+
+def measure(name: str, func, document: dict):
+    body = func(document)
+    start = time.process_time()
+    for _ in range(ITERATIONS):
+        func(document)
+    cpu_ms = (time.process_time() - start) / ITERATIONS * 1000
+    print(f"{name:<20} {cpu_ms:>10.2f} ms CPU/request {len(body):>12,} bytes")
+
+def main():
+    document = build_session_document(MESSAGE_COUNT)
+    print(f"Session with {MESSAGE_COUNT} messages, {ITERATIONS} iterations")
+    measure("pydantic + json", model_path, document)
+    measure("orjson", fast_path, document)
+    measure("orjson + gzip", fast_path_gzip, document)
+    measure("orjson + brotli", fast_path_brotli, document)
+
+if __name__ == "__main__":
+    main()
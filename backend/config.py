@@ -37,6 +37,15 @@ class Settings:
     MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
     ALLOWED_FILE_TYPES = [".pdf", ".txt", ".docx"]
     
+    # Response Settings
+    COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", 1024))  # bytes
+    GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", 6))
+    BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", 4))
+    
+    # Bulk Export/Import Settings
+    MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", 1000))  # sessions per batch
+    IMPORT_BATCH_BYTES = int(os.getenv("IMPORT_BATCH_BYTES", 16 * 1024 * 1024))  # NDJSON bytes per batch
+    
     # Development Settings
     DEBUG = os.getenv("DEBUG", "True").lower() == "true"
     
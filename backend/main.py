@@ -1,13 +1,14 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException, Depends
+from fastapi import FastAPI, File, UploadFile, HTTPException, Depends, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 import uuid
 import os
 from datetime import datetime
-from typing import List
+from typing import List, Optional
 
 from config import settings
 from models import *
+from responses import session_json_response
 from services.chat_service import ChatService
 from services.document_service import DocumentService
 from services.history_service import HistoryService
@@ -37,6 +38,29 @@ document_service = DocumentService()
 history_service = HistoryService()
 prompt_service = PromptService()
 
+async def iter_ndjson_lines(chunks):
+    """Split a stream of byte chunks into decoded lines"""
+    # Only the new chunk is scanned; a partial line is kept as pieces and
+    # joined once its newline arrives, so long lines stay linear
+    pending = []
+    async for chunk in chunks:
+        *complete, tail = chunk.split(b"\n")
+        for piece in complete:
+            pending.append(piece)
+            yield b"".join(pending).decode("utf-8")
+            pending = []
+        if tail:
+            pending.append(tail)
+    if pending:
+        yield b"".join(pending).decode("utf-8")
+
+@app.on_event("startup")
+async def create_indexes():
+    try:
+        await history_service.ensure_indexes()
+    except Exception as e:
+        print(f"Warning: Could not create session indexes: {e}")
+
 @app.get("/")
 async def root():
     return {"message": "Agentic Chatbot API", "version": "1.0.0", "status": "running"}
@@ -93,22 +117,63 @@ async def create_session(request: SessionCreateRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/sessions", response_model=List[ChatSession])
-async def get_sessions():
+async def get_sessions(request: Request):
     """Get all chat sessions"""
     try:
-        sessions = await history_service.get_sessions()
-        return sessions
+        sessions = await history_service.get_session_documents()
+        return await session_json_response(request, sessions)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/sessions/export")
+async def export_sessions(after: Optional[str] = None, batch_size: int = Query(500, ge=1, le=settings.MAX_BATCH_SIZE)):
+    """Stream all chat sessions as NDJSON"""
+    try:
+        lines = history_service.export_sessions(after=after, batch_size=batch_size)
+        # Pull the first line eagerly so an unknown resume id surfaces as a 400
+        first = await lines.__anext__()
+    except StopAsyncIteration:
+        first = None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    async def body():
+        if first is not None:
+            yield first
+            async for line in lines:
+                yield line
+
+    return StreamingResponse(body(), media_type="application/x-ndjson")
+
+@app.post("/api/sessions/import")
+async def import_sessions(
+    request: Request,
+    skip: int = Query(0, ge=0),
+    batch_size: int = Query(500, ge=1, le=settings.MAX_BATCH_SIZE)
+):
+    """Bulk import chat sessions from an NDJSON request body"""
+    stats = await history_service.import_sessions(
+        iter_ndjson_lines(request.stream()),
+        skip=skip,
+        batch_size=batch_size
+    )
+    if "error" in stats:
+        # Keep the resume token in the body so the client can retry with ?skip=
+        return JSONResponse(status_code=500, content=stats)
+    return stats
+
 @app.get("/api/sessions/{session_id}", response_model=ChatSession)
-async def get_session(session_id: str):
+async def get_session(session_id: str, request: Request):
     """Get a specific chat session"""
     try:
-        session = await history_service.get_session(session_id)
+        session = await history_service.get_session_document(session_id)
         if not session:
             raise HTTPException(status_code=404, detail="Session not found")
-        return session
+        return await session_json_response(request, session)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -160,6 +225,18 @@ async def upload_document(session_id: str, file: UploadFile = File(...)):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/documents/search", response_model=List[DocumentSearchResult])
+async def search_documents(request: DocumentSearchRequest):
+    """Search indexed document chunks across all sessions"""
+    try:
+        return await document_service.search_all_sessions(
+            request.query,
+            k=request.k,
+            session_ids=request.session_ids
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.post("/api/documents/analyze")
 async def analyze_document(request: DocumentAnalysisRequest):
     """Analyze document content with a specific question"""
@@ -1,5 +1,5 @@
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 from enum import Enum
@@ -50,3 +50,15 @@ class DocumentAnalysisRequest(BaseModel):
     document_content: str
     question: str
     model: ModelType
+
+class DocumentSearchRequest(BaseModel):
+    query: str
+    k: int = Field(10, ge=1, le=100)
+    session_ids: Optional[List[str]] = None
+
+class DocumentSearchResult(BaseModel):
+    session_id: str
+    document: Optional[str] = None
+    chunk_index: int
+    content: str
+    score: float
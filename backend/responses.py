@@ -0,0 +1,78 @@
+import gzip
+import hashlib
+from typing import Any, Optional, Tuple
+import brotli
+import orjson
+from fastapi import Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response
+from config import settings
+
+def _parse_accept_encoding(header: str) -> dict:
+    """Map each accepted content coding to its q-value"""
+    encodings = {}
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        if not name:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        encodings[name.strip().lower()] = quality
+    return encodings
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick brotli or gzip based on the client's Accept-Encoding header"""
+    encodings = _parse_accept_encoding(accept_encoding)
+    wildcard = encodings.get("*", 0.0)
+    best, best_quality = None, 0.0
+    for name in ("br", "gzip"):
+        quality = encodings.get(name, wildcard)
+        if quality > best_quality:
+            best, best_quality = name, quality
+    return best
+
+def _encode_body(content: Any, if_none_match: str, accept_encoding: str) -> Tuple[Optional[bytes], dict]:
+    """Serialize, tag and compress a body; returns None as body on an ETag match"""
+    body = orjson.dumps(content)
+    # Weak ETag: the same representation may be sent with different encodings
+    opaque_tag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+    headers = {"ETag": "W/" + opaque_tag, "Vary": "Accept-Encoding"}
+
+    client_tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    if "*" in client_tags or opaque_tag in client_tags:
+        return None, headers
+
+    if len(body) >= settings.COMPRESSION_MIN_SIZE:
+        encoding = choose_encoding(accept_encoding)
+        if encoding == "br":
+            body = brotli.compress(body, quality=settings.BROTLI_QUALITY)
+            headers["Content-Encoding"] = "br"
+        elif encoding == "gzip":
+            body = gzip.compress(body, compresslevel=settings.GZIP_LEVEL)
+            headers["Content-Encoding"] = "gzip"
+
+    return body, headers
+
+async def session_json_response(request: Request, content: Any, status_code: int = 200) -> Response:
+    """Serialize raw Mongo documents with orjson, with ETag and compression
+
+    Callers must pass documents already shaped like the response model
+    (no `_id`, every model field present), since no Pydantic validation
+    happens here. Encoding runs in the threadpool: the body size is only
+    known after serializing, and large session bodies would otherwise block
+    the event loop while being hashed and compressed.
+    """
+    body, headers = await run_in_threadpool(
+        _encode_body,
+        content,
+        request.headers.get("if-none-match", ""),
+        request.headers.get("accept-encoding", "")
+    )
+    if body is None:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, status_code=status_code, headers=headers, media_type="application/json")
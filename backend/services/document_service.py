@@ -2,21 +2,59 @@
 import PyPDF2
 import docx
 import io
+import asyncio
+import heapq
 import faiss
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
+import scipy.sparse as sp
+from concurrent.futures import ThreadPoolExecutor
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
-from typing import List, Dict, Any
+from typing import List, Dict, Any, NamedTuple, Optional, Tuple
 import json
 import tempfile
 import os
 
+# Size of the hashed feature space shared by every session for global search
+GLOBAL_FEATURES = 2 ** 18
+
+class SessionIndex(NamedTuple):
+    """Everything indexed for one session, replaced as a whole on each upload"""
+    vectorizer: TfidfVectorizer  # session-local, used by search_similar_chunks
+    embeddings: Any  # session-local TF-IDF matrix
+    counts: Any  # hashed term counts in the shared global feature space (CSC)
+    squared_counts: Any  # counts squared elementwise, for global TF-IDF row norms (CSC)
+    documents: Tuple[str, ...]
+    sources: Tuple[Tuple[Optional[str], int], ...]  # (filename, chunk index within that file)
+
+class GlobalQuery(NamedTuple):
+    """A tokenised global search query, shared read-only by every shard task"""
+    columns: np.ndarray  # hashed feature ids of the query's terms
+    weights: np.ndarray  # normalized query TF-IDF times IDF, one per column
+    idf_version: int
+    idf_squared: np.ndarray
+
 class DocumentService:
     def __init__(self):
         self.vectorizer = TfidfVectorizer(max_features=1000, stop_words='english')
-        self.documents = {}  # session_id -> documents
-        self.embeddings = {}  # session_id -> embeddings
-        self.fitted = {}  # session_id -> bool
+        self.indexes = {}  # session_id -> SessionIndex
+        
+        # Global search scores every session in one hashed feature space with
+        # corpus-wide IDF, so scores from different sessions are comparable
+        self.hashing_vectorizer = HashingVectorizer(
+            n_features=GLOBAL_FEATURES, alternate_sign=False, norm=None, stop_words='english'
+        )
+        self.document_frequencies = np.zeros(GLOBAL_FEATURES)
+        self.indexed_chunks = 0
+        # Bumped whenever the document frequencies change; cached IDF and
+        # per-session row norms are only valid for the version they were built at
+        self.idf_version = 0
+        self._global_idf = None
+        self._row_norms = {}  # session_id -> (SessionIndex, idf_version, norms)
+        
+        # Each session is a shard; global searches run batches of shards on this pool
+        self.search_batches = os.cpu_count() or 1
+        self.search_executor = ThreadPoolExecutor(max_workers=self.search_batches)
         
     def extract_text_from_pdf(self, file_content: bytes) -> str:
         """Extract text from PDF file"""
@@ -74,7 +112,7 @@ class DocumentService:
             chunks = self.split_text_into_chunks(text)
             
             # Create TF-IDF embeddings for this session
-            self.add_to_index(chunks, session_id)
+            self.add_to_index(chunks, session_id, filename)
             
             return {
                 "filename": filename,
@@ -106,39 +144,73 @@ class DocumentService:
         
         return chunks
     
-    def add_to_index(self, chunks: List[str], session_id: str):
+    def add_to_index(self, chunks: List[str], session_id: str, filename: Optional[str] = None):
         """Add document chunks to TF-IDF index for specific session"""
-        # Initialize session storage if not exists
-        if session_id not in self.documents:
-            self.documents[session_id] = []
-        
-        # Add new chunks to existing documents for this session
-        self.documents[session_id].extend(chunks)
+        previous = self.indexes.get(session_id)
+        documents = (previous.documents if previous else ()) + tuple(chunks)
+        sources = (previous.sources if previous else ()) + tuple((filename, i) for i in range(len(chunks)))
+        if not documents:
+            return
         
         # Re-fit the vectorizer with all documents for this session
-        if len(self.documents[session_id]) > 0:
-            vectorizer = TfidfVectorizer(max_features=1000, stop_words='english')
-            self.embeddings[session_id] = vectorizer.fit_transform(self.documents[session_id])
-            self.fitted[session_id] = True
-            # Store the vectorizer for this session
-            setattr(self, f'vectorizer_{session_id}', vectorizer)
+        vectorizer = TfidfVectorizer(max_features=1000, stop_words='english')
+        embeddings = vectorizer.fit_transform(documents)
+        
+        # Column-major, so a query only touches the columns of its own terms
+        new_counts = self.hashing_vectorizer.transform(chunks).tocsc()
+        counts = sp.vstack([previous.counts, new_counts], format='csc') if previous else new_counts
+        counts.sum_duplicates()
+        squared_counts = sp.csc_matrix((counts.data ** 2, counts.indices, counts.indptr), shape=counts.shape)
+        
+        self._update_document_frequencies(new_counts, 1)
+        # Swap the whole index in one assignment so searches never see a mix
+        self.indexes[session_id] = SessionIndex(vectorizer, embeddings, counts, squared_counts, documents, sources)
+    
+    def _update_document_frequencies(self, counts, sign: int):
+        """Add or remove chunks from the corpus-wide document frequencies"""
+        counts = counts.tocsc()
+        counts.sum_duplicates()
+        # Stored entries per column are the chunks containing that term
+        presence = np.diff(counts.indptr)
+        # Rebind rather than mutate, so in-flight searches keep a consistent array
+        self.document_frequencies = self.document_frequencies + sign * presence
+        self.indexed_chunks += sign * counts.shape[0]
+        self.idf_version += 1
+        self._global_idf = None
+    
+    def global_idf(self) -> Tuple[int, np.ndarray, np.ndarray]:
+        """Smoothed IDF over every indexed chunk, matching TfidfVectorizer's formula
+
+        Returns the IDF version with the IDF and its square, cached until the
+        document frequencies next change.
+        """
+        if self._global_idf is None:
+            idf = np.log((1 + self.indexed_chunks) / (1 + self.document_frequencies)) + 1
+            self._global_idf = (self.idf_version, idf, idf ** 2)
+        return self._global_idf
+    
+    def _shard_row_norms(self, session_id: str, index: SessionIndex, idf_version: int,
+                         idf_squared: np.ndarray) -> np.ndarray:
+        """Global TF-IDF row norms for a session, recomputed only when the IDF changes"""
+        cached = self._row_norms.get(session_id)
+        if cached is not None and cached[0] is index and cached[1] == idf_version:
+            return cached[2]
+        norms = np.sqrt(index.squared_counts @ idf_squared)
+        self._row_norms[session_id] = (index, idf_version, norms)
+        return norms
     
     def search_similar_chunks(self, query: str, session_id: str, k: int = 5) -> List[str]:
         """Search for similar document chunks using TF-IDF similarity"""
-        if session_id not in self.fitted or not self.fitted[session_id] or len(self.documents[session_id]) == 0:
+        index = self.indexes.get(session_id)
+        if index is None:
             return []
         
         try:
-            # Get the vectorizer for this session
-            vectorizer = getattr(self, f'vectorizer_{session_id}', None)
-            if not vectorizer:
-                return []
-            
             # Transform query using fitted vectorizer
-            query_vector = vectorizer.transform([query])
+            query_vector = index.vectorizer.transform([query])
             
             # Calculate cosine similarity
-            similarities = cosine_similarity(query_vector, self.embeddings[session_id]).flatten()
+            similarities = cosine_similarity(query_vector, index.embeddings).flatten()
             
             # Get top k most similar chunks
             top_indices = similarities.argsort()[-k:][::-1]
@@ -146,14 +218,98 @@ class DocumentService:
             # Return relevant chunks
             relevant_chunks = []
             for idx in top_indices:
-                if idx < len(self.documents[session_id]) and similarities[idx] > 0.1:  # threshold
-                    relevant_chunks.append(self.documents[session_id][idx])
+                if idx < len(index.documents) and similarities[idx] > 0.1:  # threshold
+                    relevant_chunks.append(index.documents[idx])
             
             return relevant_chunks
         except Exception as e:
             print(f"Error in similarity search: {e}")
             return []
     
+    def _search_shard(self, session_id: str, index: SessionIndex, query: GlobalQuery,
+                      k: int) -> List[Tuple[float, str, int]]:
+        """Return the top k (score, session_id, chunk_index) hits from one session"""
+        try:
+            # Cosine similarity of global TF-IDF rows against the normalized query;
+            # IDF is folded into the query weights and the cached row norms.
+            # Only the query's columns are read, straight from the CSC arrays:
+            # slicing a scipy matrix per shard costs more than the arithmetic
+            counts = index.counts
+            scores = np.zeros(counts.shape[0])
+            for column, weight in zip(query.columns, query.weights):
+                start, end = counts.indptr[column], counts.indptr[column + 1]
+                # Row ids within one column are unique, so fancy += is safe
+                scores[counts.indices[start:end]] += counts.data[start:end] * weight
+            
+            norms = self._shard_row_norms(session_id, index, query.idf_version, query.idf_squared)
+            similarities = np.divide(scores, norms, out=np.zeros_like(scores), where=norms > 0)
+            
+            candidates = np.flatnonzero(similarities > 0.1)  # threshold
+            if len(candidates) > k:
+                candidates = candidates[np.argpartition(similarities[candidates], -k)[-k:]]
+            
+            return [(float(similarities[idx]), session_id, int(idx)) for idx in candidates]
+        except Exception as e:
+            print(f"Error in shard search for session {session_id}: {e}")
+            return []
+    
+    def _search_shard_batch(self, shards: List[Tuple[str, SessionIndex]], query: GlobalQuery,
+                            k: int) -> List[Tuple[float, str, int]]:
+        """Search a batch of shards in one pool task and keep its top k"""
+        hits = []
+        for session_id, index in shards:
+            hits.extend(self._search_shard(session_id, index, query, k))
+        return heapq.nlargest(k, hits)
+    
+    async def search_all_sessions(self, query: str, k: int = 10, session_ids: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Search chunks across all indexed sessions and merge the global top k
+        
+        Every session is scored in the same hashed feature space with IDF over
+        all indexed chunks, so scores are comparable across sessions (up to
+        rare hash collisions). The query is tokenised once; shards are split
+        into about one batch per CPU. Each shard reads only the columns of the
+        query's terms, and its row norms are reused until the next upload or
+        cleanup changes the IDF.
+        """
+        targets = self.indexes if session_ids is None else session_ids
+        # Read each index once; the merge below uses the same snapshot
+        snapshot = {sid: self.indexes[sid] for sid in targets if sid in self.indexes}
+        if not snapshot:
+            return []
+        
+        idf_version, idf, idf_squared = self.global_idf()
+        query_counts = self.hashing_vectorizer.transform([query])
+        query_counts.sum_duplicates()
+        columns = query_counts.indices
+        query_weights = query_counts.data * idf[columns]
+        query_norm = np.linalg.norm(query_weights)
+        if query_norm == 0:
+            return []
+        global_query = GlobalQuery(columns, query_weights * idf[columns] / query_norm, idf_version, idf_squared)
+        
+        shards = list(snapshot.items())
+        batch_count = min(self.search_batches, len(shards))
+        batches = [shards[i::batch_count] for i in range(batch_count)]
+        
+        loop = asyncio.get_running_loop()
+        batch_hits = await asyncio.gather(*[
+            loop.run_in_executor(self.search_executor, self._search_shard_batch, batch, global_query, k)
+            for batch in batches
+        ])
+        
+        results = []
+        for score, session_id, idx in heapq.nlargest(k, (hit for hits in batch_hits for hit in hits)):
+            index = snapshot[session_id]
+            filename, chunk_index = index.sources[idx]
+            results.append({
+                "session_id": session_id,
+                "document": filename,
+                "chunk_index": chunk_index,
+                "content": index.documents[idx],
+                "score": score
+            })
+        return results
+    
     async def query_document(self, session_id: str, query: str) -> str:
         """Get relevant context for a query from processed documents"""
         relevant_chunks = self.search_similar_chunks(query, session_id, k=3)
@@ -166,14 +322,7 @@ class DocumentService:
     
     def cleanup_session(self, session_id: str):
         """Clean up session data"""
-        if session_id in self.documents:
-            del self.documents[session_id]
-        if session_id in self.embeddings:
-            del self.embeddings[session_id]
-        if session_id in self.fitted:
-            del self.fitted[session_id]
-        
-        # Remove session-specific vectorizer
-        vectorizer_attr = f'vectorizer_{session_id}'
-        if hasattr(self, vectorizer_attr):
-            delattr(self, vectorizer_attr)
+        index = self.indexes.pop(session_id, None)
+        self._row_norms.pop(session_id, None)
+        if index is not None:
+            self._update_document_frequencies(index.counts, -1)
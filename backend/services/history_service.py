@@ -1,17 +1,64 @@
 
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import BulkWriteError
 from datetime import datetime
-from typing import List, Optional
+from typing import Any, AsyncIterable, AsyncIterator, Callable, Dict, List, Optional
+import json
 import uuid
 from config import settings
 from models import ChatSession, MessageResponse, SessionCreateRequest
 
+DUPLICATE_KEY_ERROR = 11000
+
+
+def _field_expressions(model, path: str) -> dict:
+    """Aggregation expressions for a model's fields, defaulting missing optional ones"""
+    expressions = {}
+    for name, field in model.__fields__.items():
+        if field.required:
+            expressions[name] = f"{path}{name}"
+        else:
+            expressions[name] = {"$ifNull": [f"{path}{name}", field.default]}
+    return expressions
+
+# Shapes raw documents exactly like ChatSession: only declared fields, with
+# missing optional fields (e.g. `document`, message `model`) filled as null
+SESSION_PROJECTION = {
+    "$project": {
+        "_id": 0,
+        **_field_expressions(ChatSession, "$"),
+        "messages": {
+            "$map": {
+                "input": {"$ifNull": ["$messages", []]},
+                "as": "message",
+                "in": _field_expressions(MessageResponse, "$$message.")
+            }
+        }
+    }
+}
+
+
+def _json_default(value: Any):
+    """Serialize values the standard JSON encoder does not handle"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
 class HistoryService:
     def __init__(self):
         self.client = AsyncIOMotorClient(settings.MONGODB_URL)
         self.db = self.client[settings.DATABASE_NAME]
         self.sessions_collection = self.db.chat_sessions
     
+    async def ensure_indexes(self):
+        """Create the unique index on session `id`
+
+        Import relies on it to skip sessions that already exist. It fails if
+        the collection already holds duplicate ids; those must be removed
+        before it can be built.
+        """
+        await self.sessions_collection.create_index("id", unique=True)
+    
     async def create_session(self, session_request: SessionCreateRequest) -> ChatSession:
         """Create a new chat session"""
         session = ChatSession(
@@ -26,19 +73,16 @@ class HistoryService:
         await self.sessions_collection.insert_one(session.dict())
         return session
     
-    async def get_sessions(self) -> List[ChatSession]:
-        """Get all chat sessions"""
-        sessions = []
-        async for session in self.sessions_collection.find().sort("created_at", -1):
-            sessions.append(ChatSession(**session))
-        return sessions
+    async def get_session_documents(self) -> List[dict]:
+        """Get all chat sessions as raw documents shaped like ChatSession"""
+        cursor = self.sessions_collection.aggregate([{"$sort": {"created_at": -1}}, SESSION_PROJECTION])
+        return await cursor.to_list(length=None)
     
-    async def get_session(self, session_id: str) -> Optional[ChatSession]:
-        """Get a specific chat session"""
-        session = await self.sessions_collection.find_one({"id": session_id})
-        if session:
-            return ChatSession(**session)
-        return None
+    async def get_session_document(self, session_id: str) -> Optional[dict]:
+        """Get a specific chat session as a raw document shaped like ChatSession"""
+        cursor = self.sessions_collection.aggregate([{"$match": {"id": session_id}}, {"$limit": 1}, SESSION_PROJECTION])
+        sessions = await cursor.to_list(length=1)
+        return sessions[0] if sessions else None
     
     async def add_message(self, session_id: str, message: MessageResponse):
         """Add a message to a session"""
@@ -58,3 +102,84 @@ class HistoryService:
         """Delete a chat session"""
         result = await self.sessions_collection.delete_one({"id": session_id})
         return result.deleted_count > 0
+
+    async def export_sessions(self, after: Optional[str] = None, batch_size: int = 500) -> AsyncIterator[str]:
+        """Stream sessions as NDJSON lines straight from a Mongo cursor
+
+        Sessions are emitted in insertion order, so the `id` of the last
+        exported session can be passed back as `after` to resume an export.
+        """
+        query = {}
+        if after:
+            anchor = await self.sessions_collection.find_one({"id": after}, {"_id": 1})
+            if not anchor:
+                raise ValueError(f"Unknown resume session id: {after}")
+            query = {"_id": {"$gt": anchor["_id"]}}
+
+        cursor = self.sessions_collection.find(query, {"_id": 0}).sort("_id", 1).batch_size(batch_size)
+        async for session in cursor:
+            yield json.dumps(session, default=_json_default) + "\n"
+
+    async def import_sessions(
+        self,
+        lines: AsyncIterable[str],
+        skip: int = 0,
+        batch_size: int = 500,
+        on_batch: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> Dict[str, Any]:
+        """Bulk insert NDJSON sessions in unordered batches
+
+        A batch is written once it holds `batch_size` sessions or its lines
+        reach `settings.IMPORT_BATCH_BYTES`, so memory stays bounded however
+        large individual sessions are. With the index from `ensure_indexes`,
+        sessions whose `id` already exists are counted as duplicates rather
+        than failing the import. The returned `resume_token` is the number of
+        lines fully written; pass it back as `skip` to resume an interrupted
+        import. If the import fails part way, the stats are still returned
+        with the last committed `resume_token` and an `error` message.
+        `on_batch` is called with the stats after every committed batch.
+        """
+        stats = {"inserted": 0, "duplicates": 0, "invalid": 0, "resume_token": skip}
+        batch = []
+        batch_bytes = 0
+        line_number = 0
+
+        try:
+            async for line in lines:
+                line_number += 1
+                if line_number <= skip or not line.strip():
+                    continue
+                try:
+                    batch.append(ChatSession(**json.loads(line)).dict())
+                    batch_bytes += len(line.encode("utf-8"))
+                except Exception:
+                    stats["invalid"] += 1
+
+                if batch and (len(batch) >= batch_size or batch_bytes >= settings.IMPORT_BATCH_BYTES):
+                    await self._insert_batch(batch, stats)
+                    batch = []
+                    batch_bytes = 0
+                    stats["resume_token"] = line_number
+                    if on_batch:
+                        on_batch(stats)
+
+            if batch:
+                await self._insert_batch(batch, stats)
+            stats["resume_token"] = max(line_number, skip)
+            if on_batch:
+                on_batch(stats)
+        except Exception as e:
+            stats["error"] = str(e)
+        return stats
+
+    async def _insert_batch(self, batch: List[dict], stats: Dict[str, Any]):
+        """Insert a batch with ordered=False, tolerating duplicate sessions"""
+        try:
+            result = await self.sessions_collection.insert_many(batch, ordered=False)
+            stats["inserted"] += len(result.inserted_ids)
+        except BulkWriteError as e:
+            errors = e.details.get("writeErrors", [])
+            stats["inserted"] += e.details.get("nInserted", 0)
+            stats["duplicates"] += sum(1 for error in errors if error.get("code") == DUPLICATE_KEY_ERROR)
+            if any(error.get("code") != DUPLICATE_KEY_ERROR for error in errors):
+                raise
@@ -0,0 +1,99 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+from typing import Optional
+import aiofiles
+from config import settings
+from services.history_service import HistoryService
+
+READ_BLOCK_SIZE = 64 * 1024
+
+def _last_newline(f, before: int) -> int:
+    """Offset of the last newline before `before`, or -1 if there is none"""
+    position = before
+    while position > 0:
+        start = max(0, position - READ_BLOCK_SIZE)
+        f.seek(start)
+        index = f.read(position - start).rfind(b"\n")
+        if index >= 0:
+            return start + index
+        position = start
+    return -1
+
+def prepare_resume(path: str) -> Optional[str]:
+    """Drop a partial trailing line from an export and return its last session id"""
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb+") as f:
+        end = _last_newline(f, f.seek(0, os.SEEK_END))
+        # Whatever follows the last newline was cut off by an interrupted write
+        f.truncate(end + 1)
+        if end < 0:
+            return None
+        start = _last_newline(f, end) + 1
+        f.seek(start)
+        return json.loads(f.read(end - start).decode("utf-8"))["id"]
+
+async def export_sessions(path: str, after: str = None, resume: bool = False, batch_size: int = 500):
+    """Write every chat session to an NDJSON file"""
+    history_service = HistoryService()
+    if resume or after:
+        last_id = prepare_resume(path)
+        after = after or last_id
+        if after:
+            print(f"Resuming export after session {after}")
+    count = 0
+    async with aiofiles.open(path, "a" if resume or after else "w", encoding="utf-8") as f:
+        async for line in history_service.export_sessions(after=after, batch_size=batch_size):
+            await f.write(line)
+            count += 1
+    print(f"Exported {count} sessions to {path}")
+
+async def import_sessions(path: str, skip: int = 0, batch_size: int = 500):
+    """Load chat sessions from an NDJSON file"""
+    history_service = HistoryService()
+    await history_service.ensure_indexes()
+
+    def report(stats: dict):
+        print(f"Progress: {json.dumps(stats)}", flush=True)
+
+    async with aiofiles.open(path, "r", encoding="utf-8") as f:
+        stats = await history_service.import_sessions(f, skip=skip, batch_size=batch_size, on_batch=report)
+    print(json.dumps(stats))
+    if "error" in stats:
+        print(f"Import interrupted; resume with --skip {stats['resume_token']}", file=sys.stderr)
+        sys.exit(1)
+
+def batch_size_type(value: str) -> int:
+    """argparse type for batch sizes"""
+    number = int(value)
+    if not 1 <= number <= settings.MAX_BATCH_SIZE:
+        raise argparse.ArgumentTypeError(f"must be between 1 and {settings.MAX_BATCH_SIZE}")
+    return number
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk export/import of chat sessions as NDJSON")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="Export sessions to an NDJSON file")
+    export_parser.add_argument("path")
+    export_parser.add_argument("--resume", action="store_true",
+                               help="Append to an interrupted export, continuing after its last complete line")
+    export_parser.add_argument("--after", help="Resume after this session id (appends to the file)")
+    export_parser.add_argument("--batch-size", type=batch_size_type, default=500)
+
+    import_parser = subparsers.add_parser("import", help="Import sessions from an NDJSON file")
+    import_parser.add_argument("path")
+    import_parser.add_argument("--skip", type=int, default=0, help="Resume token from a previous import")
+    import_parser.add_argument("--batch-size", type=batch_size_type, default=500)
+
+    args = parser.parse_args()
+    if args.command == "export":
+        asyncio.run(export_sessions(args.path, args.after, args.resume, args.batch_size))
+    else:
+        asyncio.run(import_sessions(args.path, args.skip, args.batch_size))
+
+if __name__ == "__main__":
+    main()